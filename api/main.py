@@ -5,19 +5,24 @@ from fastapi import FastAPI, Query, HTTPException
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 
-from src.db import choose_backend
+from src.db import choose_backend, resolve_alias
 from src.models import ImageTextEncoder
 from src.explain import explain
 
 app = FastAPI(title="Visual Search")
 app.mount("/images", StaticFiles(directory="images"), name="images")
 
-backend, store = choose_backend(dim=512, recreate=False)
+backend, store = choose_backend(dim=512, recreate=False, allow_unpublished=True)
 encoder = ImageTextEncoder()
 
 @app.get("/health")
 def health():
-    return {"status": "ok", "backend": backend}
+    # store.col is the alias; report which versioned collection is live behind it
+    try:
+        collection = resolve_alias(store.c, store.col)
+    except Exception:
+        return {"status": "degraded", "backend": backend, "collection": None}
+    return {"status": "ok" if collection else "degraded", "backend": backend, "collection": collection}
 
 @app.get("/", response_class=HTMLResponse)
 @app.get("/ui/", response_class=HTMLResponse)
@@ -36,10 +41,16 @@ def search_text(
         raise HTTPException(status_code=400, detail="mode must be 'image' or 'text'")
 
     qvec = encoder.embed_text(q)
-    if mode == "image":
-        hits = store.search_vector(qvec, top_k=top_k, vector_name="image_vec")
-    else:  # mode == "text"
-        hits = store.search_vector(qvec, top_k=top_k, vector_name="text_vec")
+    try:
+        if mode == "image":
+            hits = store.search_vector(qvec, top_k=top_k, vector_name="image_vec")
+        else:  # mode == "text"
+            hits = store.search_vector(qvec, top_k=top_k, vector_name="text_vec")
+    except Exception:
+        # fresh deployment: the alias only exists once the first build is published
+        if resolve_alias(store.c, store.col) is None:
+            raise HTTPException(status_code=503, detail="index not published yet")
+        raise
 
     results = []
     for score, payload in hits:
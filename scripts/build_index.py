@@ -9,7 +9,11 @@ if __name__ == "__main__":
     ap.add_argument("--images_dir", default="./images")
     ap.add_argument("--out_dir", default="outputs/index")
     ap.add_argument("--limit", type=int, default=None)
-    ap.add_argument("--recreate", action="store_true", help="Drop & recreate Qdrant collection")
+    ap.add_argument("--recreate", action="store_true",
+                    help="Build a new versioned collection and swap the alias to it when ready")
+    ap.add_argument("--no_publish", action="store_true", help="With --recreate: stage the new version but don't swap")
+    ap.add_argument("--keep", type=int, default=2, help="Versions to keep (live + rollback targets) after a swap")
     args = ap.parse_args()
 
-    build_index(images_dir=args.images_dir, out_dir=args.out_dir, limit=args.limit, recreate=args.recreate)
+    build_index(images_dir=args.images_dir, out_dir=args.out_dir, limit=args.limit, recreate=args.recreate,
+                publish=not args.no_publish, keep=args.keep)
@@ -6,7 +6,7 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from src.models import ImageTextEncoder
 from src.clean import clean_caption_and_keywords
-from src.db import choose_backend
+from src.db import try_qdrant, build_version
 
 
 def _load_meta(data_dir: str) -> list[dict]:
@@ -103,25 +103,32 @@ def rebuild_text_vecs(data_dir: str, overwrite: bool = True, push_qdrant: bool =
     #     backend, store = choose_backend(dim=dim, recreate=False)
     #     store.upsert_batch(start_id=0, image_vecs=image_vecs, text_vecs=text_vecs, metas=updated)
     #     print(f"[QDRANT] Upserted {len(updated)} cleaned points (payload + text_vec)")
+    # re-captioned points go into a new staged version, so search never mixes old and new captions
     if push_qdrant:
-        backend, store = choose_backend(dim=dim, recreate=False)
-        batch_size = 256
-        for i in range(0, len(updated), batch_size):
-            store.upsert_batch(
-                start_id=i,
-                image_vecs=image_vecs[i:i+batch_size],
-                text_vecs=text_vecs[i:i+batch_size],
-                metas=updated[i:i+batch_size],
-            )
-            print(f"[QDRANT] Upserted {i+len(updated[i:i+batch_size])}/{len(updated)}")
-        print(f"[QDRANT] Finished upserting {len(updated)} cleaned points")
+        cli = try_qdrant()
+        if cli is None:
+            raise RuntimeError("Qdrant is not reachable at QDRANT_HOST/PORT.")
+
+        def load(store):
+            batch_size = 256
+            for i in range(0, len(updated), batch_size):
+                store.upsert_batch(
+                    start_id=i,
+                    image_vecs=image_vecs[i:i+batch_size],
+                    text_vecs=text_vecs[i:i+batch_size],
+                    metas=updated[i:i+batch_size],
+                )
+                print(f"[QDRANT] Upserted {i+len(updated[i:i+batch_size])}/{len(updated)}")
+            print(f"[QDRANT] Finished upserting {len(updated)} cleaned points")
+
+        build_version(cli, dim=dim, load=load, query_vecs=list(text_vecs[:5]))
 
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--data_dir", default="outputs/index")
     ap.add_argument("--no_overwrite", action="store_true", help="Write text_vecs.cleaned.npy instead of overwriting")
-    ap.add_argument("--push_qdrant", action="store_true", help="Upsert cleaned payload + vectors to Qdrant")
+    ap.add_argument("--push_qdrant", action="store_true", help="Push cleaned payload + vectors to a new Qdrant version and swap it live")
     args = ap.parse_args()
     rebuild_text_vecs(
         data_dir=args.data_dir,
@@ -3,9 +3,9 @@ import os, json, argparse, sys
 import numpy as np
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from src.db import choose_backend
+from src.db import choose_backend, try_qdrant, build_version
 
-def load_and_push(data_dir: str):
+def load_and_push(data_dir: str, in_place: bool = False):
     iv = np.load(os.path.join(data_dir, "image_vecs.npy"))
     tv = np.load(os.path.join(data_dir, "text_vecs.npy"))
 
@@ -22,12 +22,24 @@ def load_and_push(data_dir: str):
     else:
         raise FileNotFoundError("meta.json or meta.jsonl not found")
 
-    backend, store = choose_backend(dim=iv.shape[1], recreate=False)
-    store.upsert_batch(start_id=0, image_vecs=iv, text_vecs=tv, metas=metas)
-    print(f"[DONE] Loaded {len(metas)} points into Qdrant from {data_dir}")
+    if in_place:
+        backend, store = choose_backend(dim=iv.shape[1], recreate=False)
+        store.upsert_batch(start_id=0, image_vecs=iv, text_vecs=tv, metas=metas)
+        print(f"[DONE] Upserted {len(metas)} points into live {store.col} from {data_dir}")
+        return
+
+    # full reload: stage a new version and swap it in, so nothing stale or half-loaded is served
+    cli = try_qdrant()
+    if cli is None:
+        raise RuntimeError("Qdrant is not reachable at QDRANT_HOST/PORT.")
+    staging = build_version(cli, dim=iv.shape[1], query_vecs=list(tv[:5]),
+                            load=lambda store: store.upsert_batch(start_id=0, image_vecs=iv, text_vecs=tv, metas=metas))
+    print(f"[DONE] Loaded {len(metas)} points into {staging} from {data_dir}")
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--data_dir", default="outputs/index")
+    ap.add_argument("--in_place", action="store_true",
+                    help="Upsert into the live collection instead of staging and swapping a new version")
     args = ap.parse_args()
-    load_and_push(args.data_dir)
+    load_and_push(args.data_dir, in_place=args.in_place)
@@ -0,0 +1,42 @@
+# scripts/manage_collections.py
+import argparse
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from src.db import (try_qdrant, list_versions, published_versions, resolve_alias, alias_name, version_name,
+                    swap_alias, rollback, gc_versions, drop_legacy, COLLECTION_BASE)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Inspect and switch versioned Qdrant collections")
+    ap.add_argument("--base", default=COLLECTION_BASE, help="Collection base name (versions are <base>_v<n>)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="Show versions and where the alias points")
+    p_swap = sub.add_parser("swap", help="Point the alias at a given collection")
+    p_swap.add_argument("collection", help="e.g. photos_v3 (or just 3)")
+    sub.add_parser("rollback", help="Point the alias back at the previous published version")
+    p_gc = sub.add_parser("gc", help="Delete old versions")
+    p_gc.add_argument("--keep", type=int, default=2)
+    sub.add_parser("drop_legacy", help="Delete the pre-versioning <base> collection once the alias has moved off it")
+    args = ap.parse_args()
+
+    cli = try_qdrant()
+    if cli is None:
+        raise SystemExit("Qdrant is not reachable at QDRANT_HOST/PORT.")
+
+    if args.cmd == "list":
+        live = resolve_alias(cli, alias_name(args.base))
+        published = set(published_versions(cli, args.base))
+        print(f"alias {alias_name(args.base)} -> {live}")
+        for v in list_versions(cli, args.base):
+            name = version_name(args.base, v)
+            tags = [t for t, on in (("live", name == live), ("published", v in published)) if on]
+            print(f"  {name}{'  (' + ', '.join(tags) + ')' if tags else ''}")
+    elif args.cmd == "swap":
+        target = version_name(args.base, int(args.collection)) if args.collection.isdigit() else args.collection
+        swap_alias(cli, target, args.base)
+    elif args.cmd == "rollback":
+        rollback(cli, args.base)
+    elif args.cmd == "gc":
+        gc_versions(cli, args.base, keep=args.keep)
+    elif args.cmd == "drop_legacy":
+        drop_legacy(cli, args.base)
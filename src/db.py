@@ -1,5 +1,8 @@
 import os
-from typing import List, Dict, Any, Optional, Tuple
+import re
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Callable
 import numpy as np
 
 _Q_OK = True
@@ -23,27 +26,37 @@ def try_qdrant() -> Optional["QdrantClient"]:
         return None
 
 
+# The physical data lives in versioned collections "<base>_v<n>" that are built
+# offline and swapped in. The API and loaders talk to "<base>_live", an alias
+# whose name can't collide with a legacy plain "<base>" collection, so even
+# the first swap is a single atomic alias update.
+def alias_name(base: str) -> str:
+    return f"{base}_live"
+
+
+COLLECTION_BASE = os.getenv("QDRANT_COLLECTION", "photos")
+COLLECTION_ALIAS = alias_name(COLLECTION_BASE)
+INDEXING_THRESHOLD = 20000  # Qdrant default, restored once a version is fully loaded
+
+
+def collection_schema(dim: int) -> Dict[str, Any]:
+    """Vector + HNSW config shared by every photos collection (live, legacy and versions)."""
+    return {
+        "vectors_config": {
+            "image_vec": qm.VectorParams(size=dim, distance=qm.Distance.COSINE),
+            "text_vec":  qm.VectorParams(size=dim, distance=qm.Distance.COSINE),
+        },
+        "hnsw_config": qm.HnswConfigDiff(m=16, ef_construct=128),
+    }
+
+
 def ensure_collection(client: "QdrantClient", name: str, dim: int, recreate: bool = False):
     if recreate:
-        client.recreate_collection(
-            collection_name=name,
-            vectors_config={
-                "image_vec": qm.VectorParams(size=dim, distance=qm.Distance.COSINE),
-                "text_vec":  qm.VectorParams(size=dim, distance=qm.Distance.COSINE),
-            },
-            hnsw_config=qm.HnswConfigDiff(m=16, ef_construct=128),
-        )
+        client.recreate_collection(collection_name=name, **collection_schema(dim))
     else:
         exists = any(c.name == name for c in client.get_collections().collections)
         if not exists:
-            client.create_collection(
-                collection_name=name,
-                vectors_config={
-                    "image_vec": qm.VectorParams(size=dim, distance=qm.Distance.COSINE),
-                    "text_vec":  qm.VectorParams(size=dim, distance=qm.Distance.COSINE),
-                },
-                hnsw_config=qm.HnswConfigDiff(m=16, ef_construct=128),
-            )
+            client.create_collection(collection_name=name, **collection_schema(dim))
     # indexes for payload
     for field, schema in (("keywords", qm.PayloadSchemaType.KEYWORD),
                           ("caption",  qm.PayloadSchemaType.TEXT)):
@@ -54,7 +67,7 @@ def ensure_collection(client: "QdrantClient", name: str, dim: int, recreate: boo
 
 
 class QdrantStore:
-    def __init__(self, client: "QdrantClient", collection: str = "photos"):
+    def __init__(self, client: "QdrantClient", collection: str = COLLECTION_ALIAS):
         self.c = client
         self.col = collection
 
@@ -96,9 +109,303 @@ class QdrantStore:
         return [(m["score"], m["payload"]) for m in merged]
 
 
-def choose_backend(dim: int, recreate: bool = False) -> Tuple[str, QdrantStore]:
+# ---------------------------------------------------------------------------
+# Versioned collections + alias swap (zero-downtime reindex)
+# ---------------------------------------------------------------------------
+
+def registry_name(base: str = COLLECTION_BASE) -> str:
+    return f"{base}_registry"
+
+
+def version_name(base: str, version: int) -> str:
+    return f"{base}_v{version}"
+
+
+def version_of(name: Optional[str], base: str = COLLECTION_BASE) -> Optional[int]:
+    m = re.match(rf"^{re.escape(base)}_v(\d+)$", name or "")
+    return int(m.group(1)) if m else None
+
+
+def _collection_names(client: "QdrantClient") -> List[str]:
+    return [c.name for c in client.get_collections().collections]
+
+
+def list_versions(client: "QdrantClient", base: str = COLLECTION_BASE) -> List[int]:
+    versions = [version_of(n, base) for n in _collection_names(client)]
+    return sorted(v for v in versions if v is not None)
+
+
+def resolve_alias(client: "QdrantClient", alias: str = COLLECTION_ALIAS) -> Optional[str]:
+    """Return the collection the alias currently points to (None if unset)."""
+    for a in client.get_aliases().aliases:
+        if a.alias_name == alias:
+            return a.collection_name
+    return None
+
+
+def published_versions(client: "QdrantClient", base: str = COLLECTION_BASE) -> List[int]:
+    """
+    Versions that went live, weren't rolled away from, and still exist.
+    Rollback targets and gc keepers are only ever chosen from these.
+    """
+    existing = set(list_versions(client, base))
+    return sorted(v for v, payload in _registry_entries(client, base).items()
+                  if v in existing and not payload.get("rolled_back"))
+
+
+def _registry_entries(client: "QdrantClient", base: str = COLLECTION_BASE) -> Dict[int, Dict[str, Any]]:
+    reg = registry_name(base)
+    if reg not in _collection_names(client):
+        return {}
+    points, _ = client.scroll(reg, limit=10_000, with_payload=True, with_vectors=False)
+    return {int(p.id): (p.payload or {}) for p in points}
+
+
+def _record_published(client: "QdrantClient", version: int, base: str = COLLECTION_BASE):
+    reg = registry_name(base)
+    if reg not in _collection_names(client):
+        # Qdrant has no collection metadata, so the publish log is a tiny
+        # collection of dummy 1-d points keyed by version number.
+        client.create_collection(reg, vectors_config=qm.VectorParams(size=1, distance=qm.Distance.DOT))
+    client.upsert(reg, points=[qm.PointStruct(id=version, vector=[0.0],
+                                              payload={"version": version, "published_at": time.time(),
+                                                       "rolled_back": False})], wait=True)
+
+
+def _mark_rolled_back(client: "QdrantClient", version: int, base: str = COLLECTION_BASE):
+    client.set_payload(registry_name(base), payload={"rolled_back": True}, points=[version], wait=True)
+
+
+def ensure_alias(client: "QdrantClient", base: str = COLLECTION_BASE) -> bool:
+    """
+    Return True if the alias resolves to something searchable. A legacy plain
+    "<base>" collection is adopted by pointing the alias at it (nothing is
+    moved or dropped). A fresh deployment stays unpublished until the first
+    build goes through `build_version`.
+    """
+    alias = alias_name(base)
+    if resolve_alias(client, alias) is not None:
+        return True
+    if base in _collection_names(client):
+        client.update_collection_aliases(change_aliases_operations=[
+            qm.CreateAliasOperation(create_alias=qm.CreateAlias(collection_name=base, alias_name=alias))])
+        print(f"[QDRANT] alias {alias} -> legacy collection {base}")
+        return True
+    print(f"[WARN] alias {alias} not published yet; run scripts.build_index to build the first version")
+    return False
+
+
+def create_version(client: "QdrantClient", dim: int, base: str = COLLECTION_BASE) -> str:
+    """
+    Create the next "<base>_v<n>" collection with HNSW indexing deferred
+    (indexing_threshold=0) so bulk upserts don't rebuild the graph as they go.
+    """
+    name = version_name(base, max(list_versions(client, base), default=0) + 1)
+    client.create_collection(
+        collection_name=name,
+        optimizers_config=qm.OptimizersConfigDiff(indexing_threshold=0),
+        **collection_schema(dim),
+    )
+    ensure_collection(client, name, dim)  # payload indexes
+    print(f"[QDRANT] created staging collection {name}")
+    return name
+
+
+@contextmanager
+def staged_version(client: "QdrantClient", dim: int, base: str = COLLECTION_BASE) -> Iterator[str]:
+    """Yield a fresh staging collection; drop it if loading/indexing/warmup fails."""
+    name = create_version(client, dim, base)
+    try:
+        yield name
+    except BaseException:
+        print(f"[QDRANT] staging failed, dropping {name}")
+        client.delete_collection(name)
+        raise
+
+
+def finalize_version(client: "QdrantClient", name: str, timeout: float = 1800.0, poll: float = 2.0,
+                     settle: float = 30.0):
+    """
+    Turn indexing back on and block until the optimizer has finished.
+
+    Optimizers start asynchronously, so a GREEN right after the update means
+    nothing. We're done once we've seen the collection busy (YELLOW/GREY) and
+    come back GREEN, or it's GREEN with every vector indexed, or it has sat
+    GREEN for `settle` seconds (segments below the threshold stay plain).
+    """
+    client.update_collection(
+        collection_name=name,
+        optimizers_config=qm.OptimizersConfigDiff(indexing_threshold=INDEXING_THRESHOLD),
+    )
+    deadline = time.time() + timeout
+    seen_busy = False
+    green_since: Optional[float] = None
+    while True:
+        info = client.get_collection(name)
+        if info.status == qm.CollectionStatus.RED:
+            raise RuntimeError(f"Collection {name} failed to optimize (status RED)")
+        if info.status == qm.CollectionStatus.GREEN:
+            points = info.points_count or 0
+            indexed = info.indexed_vectors_count or 0
+            green_since = green_since or time.time()
+            if seen_busy or (points and indexed >= points):
+                break
+            if time.time() - green_since >= settle:
+                print(f"[QDRANT] {name} stayed GREEN with no optimization; segments below indexing threshold")
+                break
+        else:
+            seen_busy = True
+            green_since = None
+            if info.status == qm.CollectionStatus.GREY:
+                # Optimizations pending but not running; an empty update kicks them off.
+                client.update_collection(collection_name=name, optimizers_config=qm.OptimizersConfigDiff())
+        if time.time() > deadline:
+            raise TimeoutError(f"Collection {name} still {info.status} after {timeout:.0f}s")
+        time.sleep(poll)
+    print(f"[QDRANT] {name} indexed ({info.indexed_vectors_count}/{info.points_count} vectors/points)")
+
+
+def _check_publishable(client: "QdrantClient", name: str, base: str = COLLECTION_BASE):
+    if version_of(name, base) is None and name != base:
+        raise ValueError(f"{name} is not a {base}_v<n> version or the legacy {base} collection")
+    if name not in _collection_names(client):
+        raise ValueError(f"Collection {name} does not exist")
+    if client.count(collection_name=name, exact=True).count == 0:
+        raise RuntimeError(f"Refusing to publish empty collection {name}")
+
+
+def warmup(client: "QdrantClient", name: str, query_vecs: List[np.ndarray], top_k: int = 5):
+    """Run sample queries on both named vectors so the new version is hot before it goes live."""
+    if client.count(collection_name=name, exact=True).count == 0:
+        raise RuntimeError(f"Refusing to publish empty collection {name}")
+    store = QdrantStore(client, name)
+    for q in query_vecs:
+        for vector_name in ("image_vec", "text_vec"):
+            store.search_vector(q, top_k=top_k, vector_name=vector_name)
+    print(f"[QDRANT] warmed up {name} with {len(query_vecs)} queries")
+
+
+def swap_alias(client: "QdrantClient", name: str, base: str = COLLECTION_BASE) -> Optional[str]:
+    """
+    Atomically point the alias at collection `name`; returns the previous target.
+    Delete + create are sent as one request, so readers never see a gap.
+    """
+    _check_publishable(client, name, base)
+    alias = alias_name(base)
+    previous = resolve_alias(client, alias)
+    ops: List[Any] = []
+    if previous is not None:
+        ops.append(qm.DeleteAliasOperation(delete_alias=qm.DeleteAlias(alias_name=alias)))
+    ops.append(qm.CreateAliasOperation(create_alias=qm.CreateAlias(collection_name=name, alias_name=alias)))
+    client.update_collection_aliases(change_aliases_operations=ops)
+    version = version_of(name, base)
+    if version is not None:
+        _record_published(client, version, base)
+    print(f"[QDRANT] alias {alias}: {previous} -> {name}")
+    return previous
+
+
+def publish_version(client: "QdrantClient", name: str, base: str = COLLECTION_BASE, keep: int = 2) -> Optional[str]:
+    """Swap a finalized, warmed-up staging collection live and GC old versions."""
+    previous = swap_alias(client, name, base)
+    gc_versions(client, base, keep=keep)
+    return previous
+
+
+def build_version(client: "QdrantClient", dim: int, load: Callable[[QdrantStore], None],
+                  query_vecs: List[np.ndarray], base: str = COLLECTION_BASE, publish: bool = True,
+                  keep: int = 2) -> str:
+    """
+    Full rebuild without downtime: stage a new version, fill it via `load`,
+    finalize + warm up, then (optionally) swap it live. A failure before the
+    swap drops the staging collection and leaves the live alias untouched.
+    """
+    with staged_version(client, dim, base) as staging:
+        load(QdrantStore(client, staging))
+        finalize_version(client, staging)
+        warmup(client, staging, query_vecs)
+    if publish:
+        publish_version(client, staging, base, keep=keep)
+    else:
+        print(f"[INFO] {staging} staged; publish with scripts.manage_collections swap {staging}")
+    return staging
+
+
+def rollback(client: "QdrantClient", base: str = COLLECTION_BASE) -> str:
+    """
+    Point the alias back at the newest published version older than the live
+    one. The version rolled away from is marked in the registry so it never
+    becomes a rollback target or gc keeper again.
+    """
+    current = resolve_alias(client, alias_name(base))
+    live = version_of(current, base)
+    if live is None:
+        raise RuntimeError(f"Alias {alias_name(base)} does not point at a versioned collection; nothing to roll back")
+    older = [v for v in published_versions(client, base) if v < live]
+    if not older:
+        raise RuntimeError(f"No published version older than {current} to roll back to")
+    target = version_name(base, older[-1])
+    swap_alias(client, target, base)
+    _mark_rolled_back(client, live, base)
+    return target
+
+
+def gc_versions(client: "QdrantClient", base: str = COLLECTION_BASE, keep: int = 2) -> List[str]:
+    """
+    Drop versions older than the live one, keeping the `keep - 1` newest
+    published ones as rollback targets. Older versions that never went live
+    (failed or abandoned builds) are always dropped; newer ones (staged or
+    rolled back from) and the legacy "<base>" collection are left alone.
+    """
+    live = version_of(resolve_alias(client, alias_name(base)), base)
+    if live is None:
+        return []
+    published = set(published_versions(client, base))
+    older = [v for v in list_versions(client, base) if v < live]
+    spare = max(keep - 1, 0)
+    older_published = [v for v in older if v in published]
+    kept = set(older_published[-spare:]) if spare else set()
+    dropped = []
+    for v in older:
+        if v in kept:
+            continue
+        name = version_name(base, v)
+        client.delete_collection(name)
+        dropped.append(name)
+        print(f"[QDRANT] dropped {name}")
+    registered = _registry_entries(client, base)
+    stale = [version_of(n, base) for n in dropped if version_of(n, base) in registered]
+    if stale:
+        client.delete(registry_name(base), points_selector=qm.PointIdsList(points=stale), wait=True)
+    return dropped
+
+
+def drop_legacy(client: "QdrantClient", base: str = COLLECTION_BASE):
+    """Delete the pre-versioning "<base>" collection once the alias has moved off it."""
+    if resolve_alias(client, alias_name(base)) == base:
+        raise RuntimeError(f"Alias {alias_name(base)} still points at {base}; publish a version first")
+    client.delete_collection(base)
+    print(f"[QDRANT] dropped legacy collection {base}")
+
+
+def choose_backend(dim: int, recreate: bool = False, collection: Optional[str] = None,
+                   allow_unpublished: bool = False) -> Tuple[str, QdrantStore]:
+    """
+    Default: a store bound to the alias, so searches follow alias swaps
+    without restarting the API. Passing `collection` targets that physical
+    collection directly (e.g. a staging version). Raises if nothing is
+    published yet unless `allow_unpublished` (the API answers 503 instead).
+    """
     cli = try_qdrant()
     if cli is None:
         raise RuntimeError("Qdrant is not reachable at QDRANT_HOST/PORT.")
-    ensure_collection(cli, "photos", dim, recreate=recreate)
-    return "qdrant", QdrantStore(cli)
+    if collection is not None:
+        ensure_collection(cli, collection, dim, recreate=recreate)
+        return "qdrant", QdrantStore(cli, collection)
+    if recreate:
+        raise ValueError("recreate would drop the live collection; build a new version with "
+                         "build_index(recreate=True) instead")
+    if not ensure_alias(cli) and not allow_unpublished:
+        raise RuntimeError(f"Alias {COLLECTION_ALIAS} is not published yet; build the first version with "
+                           "scripts.build_index or scripts.load_existing_data")
+    return "qdrant", QdrantStore(cli, COLLECTION_ALIAS)
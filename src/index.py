@@ -1,18 +1,48 @@
 """
 Convenience wrapper: preprocess, embed, save locally, and push to Qdrant.
+
+With recreate=True (or when nothing is published yet) the build goes into a
+fresh versioned collection (photos_v<n>) while the live one keeps serving;
+the alias is only swapped once the new version is indexed and warmed up.
 """
 import os
-from typing import Optional
-from .db import choose_backend
+from typing import Optional, Sequence
+from .db import choose_backend, try_qdrant, ensure_alias, build_version
+from .models import ImageTextEncoder
 from .preprocess import preprocess_and_index
 
-def build_index(images_dir: str, out_dir: str = "outputs/index", limit: Optional[int] = None, recreate: bool = False):
-    backend, store = choose_backend(dim=512, recreate=recreate)
-    print(f"[INFO] Vector backend: {backend.upper()}")
+WARMUP_QUERIES = (
+    "a dog on a couch",
+    "yellow flower",
+    "blue mountain with red sun",
+    "people walking on a street",
+    "ocean waves at sunset",
+)
+
+
+def build_index(images_dir: str, out_dir: str = "outputs/index", limit: Optional[int] = None, recreate: bool = False,
+                publish: bool = True, keep: int = 2, warmup_queries: Sequence[str] = WARMUP_QUERIES):
     print(f"[INFO] Using images from: {images_dir}")
     print(f"[INFO] Limit: {limit}")
-    preprocess_and_index(images_dir=images_dir, out_dir=out_dir, limit=limit, store=store, batch_size=64)
-    print(f"[DONE] Indexed {limit or 'all'} images from {images_dir}")
+    enc = ImageTextEncoder()
+    cli = try_qdrant()
+    if cli is None:
+        raise RuntimeError("Qdrant is not reachable at QDRANT_HOST/PORT.")
+
+    if not recreate and ensure_alias(cli):
+        backend, store = choose_backend(dim=512, recreate=False)
+        print(f"[INFO] Vector backend: {backend.upper()} (upserting into live {store.col})")
+        preprocess_and_index(images_dir=images_dir, out_dir=out_dir, limit=limit, store=store, batch_size=64, enc=enc)
+        print(f"[DONE] Indexed {limit or 'all'} images from {images_dir}")
+        return
+
+    def load(store):
+        print(f"[INFO] Vector backend: QDRANT (staging {store.col})")
+        preprocess_and_index(images_dir=images_dir, out_dir=out_dir, limit=limit, store=store, batch_size=64, enc=enc)
+        print(f"[DONE] Indexed {limit or 'all'} images from {images_dir}")
+
+    build_version(cli, dim=512, load=load, query_vecs=[enc.embed_text(q) for q in warmup_queries],
+                  publish=publish, keep=keep)
 
 if __name__ == "__main__":
     build_index("./images", "outputs/index", limit=None, recreate=False)
@@ -44,9 +44,10 @@ def preprocess_and_index(
     limit: int | None,
     store: QdrantStore | None,
     batch_size: int = 64,
+    enc: ImageTextEncoder | None = None,
 ) -> Tuple[np.ndarray, np.ndarray, List[Dict[str, Any]]]:
     os.makedirs(out_dir, exist_ok=True)
-    enc = ImageTextEncoder()
+    enc = enc or ImageTextEncoder()
     capper = BlipCaptioner()
 
     img_vecs: List[np.ndarray] = []
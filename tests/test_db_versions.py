@@ -0,0 +1,183 @@
+import os, sys
+from functools import partial
+from types import SimpleNamespace
+import numpy as np
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+qdrant_client = pytest.importorskip("qdrant_client")
+from qdrant_client import QdrantClient, models as qm
+
+import src.db as db
+from src.db import (QdrantStore, alias_name, version_of, list_versions, resolve_alias, published_versions,
+                    ensure_alias, create_version, staged_version, finalize_version, swap_alias, build_version,
+                    rollback, gc_versions, choose_backend, COLLECTION_BASE, COLLECTION_ALIAS)
+
+BASE = "t"
+DIM = 4
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # local mode never runs optimizers, so don't wait out the settle window on every build
+    monkeypatch.setattr(db, "finalize_version", partial(finalize_version, poll=0, settle=0))
+    return QdrantClient(":memory:")
+
+
+def _fill(store: QdrantStore, n: int = 3):
+    vecs = np.random.rand(n, DIM).astype("float32")
+    store.upsert_batch(start_id=0, image_vecs=vecs, text_vecs=vecs, metas=[{"path": f"{i}.jpg"} for i in range(n)])
+
+
+def _build(client, publish=True, keep=2):
+    return build_version(client, DIM, load=_fill, query_vecs=[np.ones(DIM, dtype="float32")],
+                         base=BASE, publish=publish, keep=keep)
+
+
+def test_version_of():
+    assert version_of("t_v3", "t") == 3
+    assert version_of("t_v12", "t") == 12
+    assert version_of("t", "t") is None
+    assert version_of("t_registry", "t") is None
+    assert version_of("tt_v1", "t") is None
+    assert version_of(None, "t") is None
+
+
+def test_alias_constant_matches_helper():
+    assert COLLECTION_ALIAS == alias_name(COLLECTION_BASE)
+
+
+def test_fresh_deployment_is_unpublished(client):
+    assert ensure_alias(client, BASE) is False
+    assert list_versions(client, BASE) == []
+    assert resolve_alias(client, alias_name(BASE)) is None
+
+
+def test_legacy_collection_is_adopted_without_drop(client):
+    client.create_collection(BASE, vectors_config=qm.VectorParams(size=1, distance=qm.Distance.DOT))
+    assert ensure_alias(client, BASE) is True
+    assert resolve_alias(client, alias_name(BASE)) == BASE
+    _build(client)
+    assert resolve_alias(client, alias_name(BASE)) == "t_v1"
+    assert BASE in [c.name for c in client.get_collections().collections]
+
+
+def test_failed_staging_is_dropped(client):
+    def boom(store):
+        _fill(store)
+        raise RuntimeError("captioning crashed")
+
+    with pytest.raises(RuntimeError):
+        build_version(client, DIM, load=boom, query_vecs=[], base=BASE)
+    assert list_versions(client, BASE) == []
+
+
+def test_empty_version_is_not_published(client):
+    with pytest.raises(RuntimeError, match="empty"):
+        build_version(client, DIM, load=lambda store: None, query_vecs=[], base=BASE)
+    assert list_versions(client, BASE) == []
+    assert resolve_alias(client, alias_name(BASE)) is None
+
+
+def test_swap_rejects_non_version_targets(client):
+    _build(client)
+    for bad in ("t_registry", "t_v9", "other"):
+        with pytest.raises(ValueError):
+            swap_alias(client, bad, BASE)
+    assert resolve_alias(client, alias_name(BASE)) == "t_v1"
+
+
+def test_unpublished_staged_version_is_never_a_rollback_target(client):
+    _build(client)                      # v1 live
+    _build(client, publish=False)       # v2 staged only
+    _build(client)                      # v3 live, gc drops unpublished v2
+    assert list_versions(client, BASE) == [1, 3]
+    assert rollback(client, BASE) == "t_v1"
+
+
+def test_gc_keeps_newest_published(client):
+    for _ in range(4):
+        _build(client, keep=10)
+    assert gc_versions(client, BASE, keep=2) == ["t_v1", "t_v2"]
+    assert list_versions(client, BASE) == [3, 4]
+    assert gc_versions(client, BASE, keep=1) == ["t_v3"]
+
+
+def test_gc_without_live_version_is_noop(client):
+    with staged_version(client, DIM, BASE) as name:
+        _fill(QdrantStore(client, name))
+    assert gc_versions(client, BASE) == []
+    assert list_versions(client, BASE) == [1]
+
+
+def test_rolled_back_version_is_not_resurrected(client):
+    _build(client)                      # v1
+    _build(client)                      # v2 (good)
+    _build(client, keep=10)             # v3 (bad)
+    assert rollback(client, BASE) == "t_v2"
+    assert 3 not in published_versions(client, BASE)
+    _build(client)                      # v4, gc keeps v2 as the spare, not v3
+    assert list_versions(client, BASE) == [2, 4]
+    assert rollback(client, BASE) == "t_v2"
+
+
+def test_rollback_requires_published_older_version(client):
+    _build(client)
+    with pytest.raises(RuntimeError):
+        rollback(client, BASE)
+
+
+def test_choose_backend_refuses_unpublished(monkeypatch, client):
+    monkeypatch.setattr(db, "try_qdrant", lambda: client)
+    with pytest.raises(RuntimeError, match="not published"):
+        choose_backend(dim=DIM)
+    _, store = choose_backend(dim=DIM, allow_unpublished=True)
+    assert store.col == COLLECTION_ALIAS
+
+
+class _FakeClient:
+    """Replays a scripted sequence of collection states for finalize_version."""
+
+    def __init__(self, states):
+        self.states = list(states)
+        self.updates = 0
+
+    def update_collection(self, collection_name, optimizers_config):
+        self.updates += 1
+
+    def get_collection(self, name):
+        status, points, indexed = self.states.pop(0) if len(self.states) > 1 else self.states[0]
+        return SimpleNamespace(status=status, points_count=points, indexed_vectors_count=indexed)
+
+
+G, Y, GR, R = (qm.CollectionStatus.GREEN, qm.CollectionStatus.YELLOW,
+               qm.CollectionStatus.GREY, qm.CollectionStatus.RED)
+
+
+def test_finalize_ignores_green_before_optimizer_starts():
+    fake = _FakeClient([(G, 100, 0), (Y, 100, 0), (G, 100, 200)])
+    finalize_version(fake, "t_v1", poll=0, settle=60)
+    assert fake.states == [(G, 100, 200)]
+
+
+def test_finalize_triggers_optimizers_on_grey():
+    fake = _FakeClient([(GR, 100, 0), (GR, 100, 0), (G, 100, 200)])
+    finalize_version(fake, "t_v1", poll=0, settle=60)
+    assert fake.updates == 3  # threshold restore + one kick per GREY poll
+
+
+def test_finalize_accepts_fully_indexed_green():
+    fake = _FakeClient([(G, 100, 100)])
+    finalize_version(fake, "t_v1", poll=0, settle=60)
+
+
+def test_finalize_settles_when_nothing_to_index():
+    fake = _FakeClient([(G, 10, 0)])
+    finalize_version(fake, "t_v1", poll=0, settle=0)
+
+
+def test_finalize_raises_on_red_and_timeout():
+    with pytest.raises(RuntimeError):
+        finalize_version(_FakeClient([(R, 10, 0)]), "t_v1", poll=0)
+    with pytest.raises(TimeoutError):
+        finalize_version(_FakeClient([(Y, 10, 0)]), "t_v1", poll=0, timeout=0)